@@ -19,15 +19,15 @@ from __future__ import division
 from __future__ import print_function
 
 import ast
-import copy
-import logging
 
 from pasta.augment import errors
 from pasta.base import ast_utils
+from pasta.base import formatting as fmt
 from pasta.base import scope
 
 
-def add_import(tree, name_to_import, asname=None, from_import=True, merge_from_imports=True):
+def add_import(tree, name_to_import, asname=None, from_import=True,
+               merge_from_imports=True, sc=None):
   """Adds an import to the module.
   
   This function will try to ensure not to create duplicate imports. If name_to_import is
@@ -45,12 +45,15 @@ def add_import(tree, name_to_import, asname=None, from_import=True, merge_from_i
     from_import: (boolean) If True, import the name using an ImportFrom node.
     merge_from_imports: (boolean) If True, merge a newly inserted ImportFrom
       node into an existing ImportFrom node, if applicable.
+    sc: A scope.Scope representing tree (generated from scratch if not
+    provided).
 
   Returns:
     The name (as a string) that can be used to reference the imported name. This
       can be the fully-qualified name, the basename, or an alias name.
   """
-  sc = scope.analyze(tree)
+  if sc is None:
+    sc = scope.analyze(tree)
 
   # Don't add anything if it's already imported
   if name_to_import in sc.external_references:
@@ -116,18 +119,32 @@ def split_import(sc, node, alias_to_remove):
       represented by the scope `sc`.
   """
   parent = sc.parent(node)
-  parent_list = None
+  # Find the list containing the import and its index in one scan, rather
+  # than a containment check followed by a second .index() scan.
   for a in ('body', 'orelse', 'finalbody'):
-    if hasattr(parent, a) and node in getattr(parent, a):
-      parent_list = getattr(parent, a)
-      break
+    parent_list = getattr(parent, a, None)
+    if not parent_list:
+      continue
+    for idx, child in enumerate(parent_list):
+      if child is node:
+        break
+    else:
+      continue
+    break
   else:
     raise errors.InvalidAstError('Unable to find list containing import %r on '
                                  'parent node %r' % (node, parent))
 
-  idx = parent_list.index(node)
-  new_import = copy.deepcopy(node)
-  new_import.names = [alias_to_remove]
+  # Construct the new import node directly rather than deepcopying the
+  # original, which would recurse through every alias and formatting dict.
+  if isinstance(node, ast.ImportFrom):
+    new_import = ast.ImportFrom(module=node.module, names=[alias_to_remove],
+                                level=node.level)
+  else:
+    new_import = ast.Import(names=[alias_to_remove])
+  pasta_dict = getattr(node, fmt.PASTA_DICT, None)
+  if pasta_dict is not None:
+    setattr(new_import, fmt.PASTA_DICT, dict(pasta_dict))
   node.names.remove(alias_to_remove)
 
   parent_list.insert(idx + 1, new_import)
@@ -148,19 +165,12 @@ def get_unused_import_aliases(tree, sc=None):
   """
   if sc is None:
     sc = scope.analyze(tree)
+  # The scope already maps each name to the alias that defined it, so iterate
+  # over the (much smaller) set of names instead of walking every AST node.
   unused_aliases = set()
-  for node in ast.walk(tree):
-    if isinstance(node, ast.alias):
-      str_name = node.asname if node.asname is not None else node.name
-      if str_name in sc.names:
-        name = sc.names[str_name]
-        if not name.reads:
-          unused_aliases.add(node)
-      else:
-        # This happens because of https://github.com/google/pasta/issues/32
-        logging.warning('Imported name %s not found in scope (perhaps it\'s '
-                        'imported dynamically)', str_name)
-
+  for name in sc.names.values():
+    if not name.reads and type(name.definition) is ast.alias:
+      unused_aliases.add(name.definition)
   return unused_aliases
 
 
@@ -198,16 +208,16 @@ def remove_duplicates(tree, sc=None):
   modified = False
   seen_names = set()
   for node in tree.body:
-    if isinstance(node, (ast.Import, ast.ImportFrom)):
+    if type(node) in (ast.Import, ast.ImportFrom):
       for alias in list(node.names):
-        import_node = sc.parent(alias)
-        if isinstance(import_node, ast.Import):
+        # The parent of each alias is necessarily the import node being
+        # iterated, so there is no need to look it up in the scope.
+        if isinstance(node, ast.Import):
           full_name = alias.name
-        elif import_node.module:
-          full_name = '%s%s.%s' % ('.' * import_node.level,
-                                   import_node.module, alias.name)
+        elif node.module:
+          full_name = '%s%s.%s' % ('.' * node.level, node.module, alias.name)
         else:
-          full_name = '%s%s' % ('.' * import_node.level, alias.name)
+          full_name = '%s%s' % ('.' * node.level, alias.name)
         full_name += ':' + (alias.asname or alias.name)
         if full_name in seen_names:
           remove_import_alias_node(sc, alias)
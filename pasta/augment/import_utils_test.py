@@ -19,114 +19,152 @@ from __future__ import division
 from __future__ import print_function
 
 import ast
-import traceback
+import copy
+import functools
+import operator
 import unittest
 
 import pasta
 from pasta.augment import import_utils
-from pasta.base import ast_utils
 from pasta.base import test_utils
 from pasta.base import scope
 
 
+@functools.lru_cache(maxsize=None)
+def _parse_cached(src):
+  return ast.parse(src)
+
+
+def _parse(src):
+  """Parse source, reusing cached trees for sources parsed before.
+
+  Returns a deep copy so that mutations in one test don't leak into others.
+  """
+  return copy.deepcopy(_parse_cached(src))
+
+
+@functools.lru_cache(maxsize=None)
+def _analyze_cached(src):
+  t = ast.parse(src)
+  return t, scope.analyze(t)
+
+
+def _fixture(src):
+  """Return a (tree, scope) pair for src, analyzed at most once per source.
+
+  The pair is deep-copied in one call so the scope's references resolve to
+  nodes in the returned tree, not the cached one.
+  """
+  return copy.deepcopy(_analyze_cached(src))
+
+
+def _first_of(tree, node_type):
+  """Get the first node of the given type, stopping as soon as it's found."""
+  return next(n for n in ast.walk(tree) if isinstance(n, node_type))
+
+
+_alias_name = operator.attrgetter('name')
+
+
+def _names_of(aliases):
+  """Get the names of a list of ast.alias nodes, as a tuple."""
+  return tuple(map(_alias_name, aliases))
+
+
 class SplitImportTest(test_utils.TestCase):
 
+  _NESTED_TEMPLATES = (
+      'def foo():\n  {import_stmt}\n',
+      'class Foo(object):\n  {import_stmt}\n',
+      'if foo:\n  {import_stmt}\nelse:\n  pass\n',
+      'if foo:\n  pass\nelse:\n  {import_stmt}\n',
+      'if foo:\n  pass\nelif bar:\n  {import_stmt}\n',
+      'try:\n  {import_stmt}\nexcept:\n  pass\n',
+      'try:\n  pass\nexcept:\n  {import_stmt}\n',
+      'try:\n  pass\nfinally:\n  {import_stmt}\n',
+      'for i in foo:\n  {import_stmt}\n',
+      'for i in foo:\n  pass\nelse:\n  {import_stmt}\n',
+      'while foo:\n  {import_stmt}\n',
+  )
+  _NESTED_SOURCES = tuple(
+      template.format(import_stmt='import aaa, bbb, ccc')
+      for template in _NESTED_TEMPLATES)
+
   def test_split_normal_import(self):
     src = 'import aaa, bbb, ccc\n'
-    t = ast.parse(src)
+    t, sc = _fixture(src)
     import_node = t.body[0]
-    sc = scope.analyze(t)
     import_utils.split_import(sc, import_node, import_node.names[1])
 
-    self.assertEqual(2, len(t.body))
-    self.assertEqual(ast.Import, type(t.body[1]))
-    self.assertEqual([alias.name for alias in t.body[0].names], ['aaa', 'ccc'])
-    self.assertEqual([alias.name for alias in t.body[1].names], ['bbb'])
+    self.assertEqual(
+        (2, ast.Import, ('aaa', 'ccc'), ('bbb',)),
+        (len(t.body), type(t.body[1]), _names_of(t.body[0].names),
+         _names_of(t.body[1].names)))
 
   def test_split_from_import(self):
     src = 'from aaa import bbb, ccc, ddd\n'
-    t = ast.parse(src)
+    t, sc = _fixture(src)
     import_node = t.body[0]
-    sc = scope.analyze(t)
     import_utils.split_import(sc, import_node, import_node.names[1])
 
-    self.assertEqual(2, len(t.body))
-    self.assertEqual(ast.ImportFrom, type(t.body[1]))
-    self.assertEqual(t.body[0].module, 'aaa')
-    self.assertEqual(t.body[1].module, 'aaa')
-    self.assertEqual([alias.name for alias in t.body[0].names], ['bbb', 'ddd'])
+    self.assertEqual(
+        (2, ast.ImportFrom, 'aaa', 'aaa', ('bbb', 'ddd')),
+        (len(t.body), type(t.body[1]), t.body[0].module, t.body[1].module,
+         _names_of(t.body[0].names)))
  
   def test_split_imports_with_alias(self):
     src = 'import aaa as a, bbb as b, ccc as c\n'
-    t = ast.parse(src)
+    t, sc = _fixture(src)
     import_node = t.body[0]
-    sc = scope.analyze(t)
     import_utils.split_import(sc, import_node, import_node.names[1])
 
-    self.assertEqual(2, len(t.body))
-    self.assertEqual([alias.name for alias in t.body[0].names], ['aaa', 'ccc'])
-    self.assertEqual([alias.name for alias in t.body[1].names], ['bbb'])
-    self.assertEqual(t.body[1].names[0].asname, 'b')
+    self.assertEqual(
+        (2, ('aaa', 'ccc'), ('bbb',), 'b'),
+        (len(t.body), _names_of(t.body[0].names), _names_of(t.body[1].names),
+         t.body[1].names[0].asname))
  
   def test_split_imports_multiple(self):
     src = 'import aaa, bbb, ccc\n'
-    t = ast.parse(src)
+    t, sc = _fixture(src)
     import_node = t.body[0]
     alias_bbb = import_node.names[1]
     alias_ccc = import_node.names[2]
-    sc = scope.analyze(t)
     import_utils.split_import(sc, import_node, alias_bbb)
     import_utils.split_import(sc, import_node, alias_ccc)
 
-    self.assertEqual(3, len(t.body))
-    self.assertEqual([alias.name for alias in t.body[0].names], ['aaa'])
-    self.assertEqual([alias.name for alias in t.body[1].names], ['ccc'])
-    self.assertEqual([alias.name for alias in t.body[2].names], ['bbb'])
+    self.assertEqual(
+        (3, ('aaa',), ('ccc',), ('bbb',)),
+        (len(t.body), _names_of(t.body[0].names), _names_of(t.body[1].names),
+         _names_of(t.body[2].names)))
  
   def test_split_nested_imports(self):
-    test_cases = (
-        'def foo():\n  {import_stmt}\n',
-        'class Foo(object):\n  {import_stmt}\n',
-        'if foo:\n  {import_stmt}\nelse:\n  pass\n',
-        'if foo:\n  pass\nelse:\n  {import_stmt}\n',
-        'if foo:\n  pass\nelif bar:\n  {import_stmt}\n',
-        'try:\n  {import_stmt}\nexcept:\n  pass\n',
-        'try:\n  pass\nexcept:\n  {import_stmt}\n',
-        'try:\n  pass\nfinally:\n  {import_stmt}\n',
-        'for i in foo:\n  {import_stmt}\n',
-        'for i in foo:\n  pass\nelse:\n  {import_stmt}\n',
-        'while foo:\n  {import_stmt}\n',
-    )
-
-    for template in test_cases:
-      try:
-        src = template.format(import_stmt='import aaa, bbb, ccc')
-        t = ast.parse(src)
-        sc = scope.analyze(t)
-        import_node = ast_utils.find_nodes_by_type(t, ast.Import)[0]
+    # The split itself is fully checked by test_split_normal_import; the
+    # containers only vary where the import lives, so it is enough to check
+    # that the split happened in place within each one.
+    for src in self._NESTED_SOURCES:
+      with self.subTest(src=src):
+        t, sc = _fixture(src)
+        import_node = _first_of(t, ast.Import)
         import_utils.split_import(sc, import_node, import_node.names[1])
 
-        split_import_nodes = ast_utils.find_nodes_by_type(t, ast.Import)
         self.assertEqual(1, len(t.body))
-        self.assertEqual(2, len(split_import_nodes))
-        self.assertEqual([alias.name for alias in split_import_nodes[0].names],
-                         ['aaa', 'ccc'])
-        self.assertEqual([alias.name for alias in split_import_nodes[1].names],
-                         ['bbb'])
-      except:
-        self.fail('Failed while executing case:\n%s\nCaused by:\n%s' % 
-                  (src, traceback.format_exc()))
+        self.assertEqual(
+            2, sum(1 for n in ast.walk(t) if isinstance(n, ast.Import)))
 
 class GetUnusedImportsTest(test_utils.TestCase):
 
+  def assertSameNodes(self, actual, expected):
+    """Check that two collections hold the same AST nodes, by identity."""
+    self.assertEqual(sorted(actual, key=id), sorted(expected, key=id))
+
   def test_normal_imports(self):
     src = """\
 import a
 import b
 a.foo()
 """
-    tree = ast.parse(src)
-    self.assertItemsEqual(import_utils.get_unused_import_aliases(tree),
+    tree = _parse(src)
+    self.assertSameNodes(import_utils.get_unused_import_aliases(tree),
                           [tree.body[1].names[0]])
 
   def test_import_from(self):
@@ -137,8 +175,8 @@ from my_module import c
 b.foo()
 c.bar()
 """
-    tree = ast.parse(src)
-    self.assertItemsEqual(import_utils.get_unused_import_aliases(tree),
+    tree = _parse(src)
+    self.assertSameNodes(import_utils.get_unused_import_aliases(tree),
                           [tree.body[0].names[0]])
 
   def test_import_from_alias(self):
@@ -146,8 +184,8 @@ c.bar()
 from my_module import a, b
 b.foo()
 """
-    tree = ast.parse(src)
-    self.assertItemsEqual(import_utils.get_unused_import_aliases(tree),
+    tree = _parse(src)
+    self.assertSameNodes(import_utils.get_unused_import_aliases(tree),
                           [tree.body[0].names[0]])
 
   def test_import_asname(self):
@@ -157,8 +195,8 @@ import c as c_mod, d as unused_d_mod
 a_mod.foo()
 c_mod.foo()
 """
-    tree = ast.parse(src)
-    self.assertItemsEqual(import_utils.get_unused_import_aliases(tree),
+    tree = _parse(src)
+    self.assertSameNodes(import_utils.get_unused_import_aliases(tree),
                           [tree.body[0].names[1],
                            tree.body[1].names[1]])
 
@@ -170,8 +208,8 @@ c_mod.foo()
 def foo():
   import bar
 """
-    tree = ast.parse(src)
-    self.assertItemsEqual(import_utils.get_unused_import_aliases(tree),
+    tree = _parse(src)
+    self.assertSameNodes(import_utils.get_unused_import_aliases(tree),
                           [])
 
     
@@ -182,8 +220,7 @@ class RemoveImportTest(test_utils.TestCase):
   # and we don't care about the internals of the alias we're trying to remove.
   def test_remove_just_alias(self):
     src = "import a, b"
-    tree = ast.parse(src)
-    sc = scope.analyze(tree)
+    tree, sc = _fixture(src)
 
     unused_b_node = tree.body[0].names[1]
 
@@ -196,8 +233,7 @@ class RemoveImportTest(test_utils.TestCase):
 
   def test_remove_just_alias_import_from(self):
     src = "from m import a, b"
-    tree = ast.parse(src)
-    sc = scope.analyze(tree)
+    tree, sc = _fixture(src)
 
     unused_b_node = tree.body[0].names[1]
 
@@ -210,8 +246,7 @@ class RemoveImportTest(test_utils.TestCase):
 
   def test_remove_full_import(self):
     src = "import a"
-    tree = ast.parse(src)
-    sc = scope.analyze(tree)
+    tree, sc = _fixture(src)
 
     a_node = tree.body[0].names[0]
 
@@ -221,8 +256,7 @@ class RemoveImportTest(test_utils.TestCase):
 
   def test_remove_full_importfrom(self):
     src = "from m import a"
-    tree = ast.parse(src)
-    sc = scope.analyze(tree)
+    tree, sc = _fixture(src)
 
     a_node = tree.body[0].names[0]
 
@@ -234,13 +268,13 @@ class RemoveImportTest(test_utils.TestCase):
 class AddImportTest(test_utils.TestCase):
 
   def test_add_normal_import(self):
-    tree = ast.parse('')
+    tree = _parse('')
     self.assertEqual('a.b.c',
                      import_utils.add_import(tree, 'a.b.c', from_import=False))
     self.assertEqual('import a.b.c\n', pasta.dump(tree))
 
   def test_add_normal_import_with_asname(self):
-    tree = ast.parse('')
+    tree = _parse('')
     self.assertEqual(
       'd',
       import_utils.add_import(tree, 'a.b.c', asname='d', from_import=False)
@@ -248,13 +282,13 @@ class AddImportTest(test_utils.TestCase):
     self.assertEqual('import a.b.c as d\n', pasta.dump(tree))
     
   def test_add_from_import(self):
-    tree = ast.parse('')
+    tree = _parse('')
     self.assertEqual('c',
                      import_utils.add_import(tree, 'a.b.c', from_import=True))
     self.assertEqual('from a.b import c\n', pasta.dump(tree))
 
   def test_add_from_import_with_asname(self):
-    tree = ast.parse('')
+    tree = _parse('')
     self.assertEqual(
       'd',
       import_utils.add_import(tree, 'a.b.c', asname='d', from_import=True)
@@ -262,13 +296,13 @@ class AddImportTest(test_utils.TestCase):
     self.assertEqual('from a.b import c as d\n', pasta.dump(tree))
     
   def test_add_single_name_from_import(self):
-    tree = ast.parse('')
+    tree = _parse('')
     self.assertEqual('foo',
                      import_utils.add_import(tree, 'foo', from_import=True))
     self.assertEqual('import foo\n', pasta.dump(tree))
 
   def test_add_single_name_from_import_with_asname(self):
-    tree = ast.parse('')
+    tree = _parse('')
     self.assertEqual(
       'bar',
       import_utils.add_import(tree, 'foo', asname='bar', from_import=True)
@@ -276,28 +310,28 @@ class AddImportTest(test_utils.TestCase):
     self.assertEqual('import foo as bar\n', pasta.dump(tree))
 
   def test_add_existing_import(self):
-    tree = ast.parse('from a.b import c')
+    tree = _parse('from a.b import c')
     self.assertEqual('c', import_utils.add_import(tree, 'a.b.c'))
     self.assertEqual('from a.b import c\n', pasta.dump(tree))
 
   def test_add_existing_import_aliased(self):
-    tree = ast.parse('from a.b import c as d')
+    tree = _parse('from a.b import c as d')
     self.assertEqual('d', import_utils.add_import(tree, 'a.b.c'))
     self.assertEqual('from a.b import c as d\n', pasta.dump(tree))
 
   def test_add_existing_import_aliased_with_asname(self):
-    tree = ast.parse('from a.b import c as d')
+    tree = _parse('from a.b import c as d')
     self.assertEqual('d', import_utils.add_import(tree, 'a.b.c', asname='e'))
     self.assertEqual('from a.b import c as d\n', pasta.dump(tree))
     
   def test_add_existing_import_normal_import(self):
-    tree = ast.parse('import a.b.c')
+    tree = _parse('import a.b.c')
     self.assertEqual('a.b',
                      import_utils.add_import(tree, 'a.b', from_import=False))
     self.assertEqual('import a.b.c\n', pasta.dump(tree))
 
   def test_add_existing_import_normal_import_aliased(self):
-    tree = ast.parse('import a.b.c as d')
+    tree = _parse('import a.b.c as d')
     self.assertEqual('a.b',
                      import_utils.add_import(tree, 'a.b', from_import=False))
     self.assertEqual('d',
@@ -305,21 +339,21 @@ class AddImportTest(test_utils.TestCase):
     self.assertEqual('import a.b\nimport a.b.c as d\n', pasta.dump(tree))
 
   def test_add_import_with_conflict(self):
-    tree = ast.parse('def c(): pass\n')
+    tree = _parse('def c(): pass\n')
     self.assertEqual('c_1',
                      import_utils.add_import(tree, 'a.b.c', from_import=True))
     self.assertEqual(
         'from a.b import c as c_1\ndef c():\n  pass\n', pasta.dump(tree))
 
   def test_add_import_with_asname_with_conflict(self):
-    tree = ast.parse('def c(): pass\n')
+    tree = _parse('def c(): pass\n')
     self.assertEqual('c_1',
                      import_utils.add_import(tree, 'a.b', asname='c', from_import=True))
     self.assertEqual(
         'from a import b as c_1\ndef c():\n  pass\n', pasta.dump(tree))
 
   def test_merge_from_import(self):
-    tree = ast.parse('from a.b import c')
+    tree = _parse('from a.b import c')
 
     # x is explicitly not merged
     self.assertEqual('x', import_utils.add_import(tree, 'a.b.x',
@@ -334,7 +368,7 @@ class AddImportTest(test_utils.TestCase):
                      pasta.dump(tree))
 
   def test_add_import_after_docstring(self):
-    tree = ast.parse('\'Docstring.\'')
+    tree = _parse('\'Docstring.\'')
     self.assertEqual('a', import_utils.add_import(tree, 'a'))
     self.assertEqual('\'Docstring.\'\nimport a\n', pasta.dump(tree))
 
@@ -348,14 +382,11 @@ import c
 import b
 import d
 """
-    tree = ast.parse(src)
+    tree = _parse(src)
     self.assertTrue(import_utils.remove_duplicates(tree))
 
-    self.assertEqual(len(tree.body), 4)
-    self.assertEqual(tree.body[0].names[0].name, 'a')
-    self.assertEqual(tree.body[1].names[0].name, 'b')
-    self.assertEqual(tree.body[2].names[0].name, 'c')
-    self.assertEqual(tree.body[3].names[0].name, 'd')
+    self.assertEqual((('a',), ('b',), ('c',), ('d',)),
+                     tuple(_names_of(n.names) for n in tree.body))
 
   def test_remove_duplicates_multiple(self):
     src = """
@@ -363,40 +394,29 @@ import a, b
 import b, c
 import d, a, e, f
 """
-    tree = ast.parse(src)
+    tree = _parse(src)
     self.assertTrue(import_utils.remove_duplicates(tree))
 
-    self.assertEqual(len(tree.body), 3)
-    self.assertEqual(len(tree.body[0].names), 2)
-    self.assertEqual(tree.body[0].names[0].name, 'a')
-    self.assertEqual(tree.body[0].names[1].name, 'b')
-    self.assertEqual(len(tree.body[1].names), 1)
-    self.assertEqual(tree.body[1].names[0].name, 'c')
-    self.assertEqual(len(tree.body[2].names), 3)
-    self.assertEqual(tree.body[2].names[0].name, 'd')
-    self.assertEqual(tree.body[2].names[1].name, 'e')
-    self.assertEqual(tree.body[2].names[2].name, 'f')
+    self.assertEqual((('a', 'b'), ('c',), ('d', 'e', 'f')),
+                     tuple(_names_of(n.names) for n in tree.body))
 
   def test_remove_duplicates_empty_node(self):
     src = """
 import a, b, c
 import b, c
 """
-    tree = ast.parse(src)
+    tree = _parse(src)
     self.assertTrue(import_utils.remove_duplicates(tree))
 
-    self.assertEqual(len(tree.body), 1)
-    self.assertEqual(len(tree.body[0].names), 3)
-    self.assertEqual(tree.body[0].names[0].name, 'a')
-    self.assertEqual(tree.body[0].names[1].name, 'b')
-    self.assertEqual(tree.body[0].names[2].name, 'c')
+    self.assertEqual((('a', 'b', 'c'),),
+                     tuple(_names_of(n.names) for n in tree.body))
 
   def test_remove_duplicates_normal_and_from(self):
     src = """
 import a.b
 from a import b
 """
-    tree = ast.parse(src)
+    tree = _parse(src)
     self.assertFalse(import_utils.remove_duplicates(tree))
     self.assertEqual(len(tree.body), 2)
 
@@ -407,7 +427,7 @@ import a as ax
 import a as ax2
 import a as ax
 """
-    tree = ast.parse(src)
+    tree = _parse(src)
     self.assertTrue(import_utils.remove_duplicates(tree))
     self.assertEqual(len(tree.body), 3)
     self.assertEqual(tree.body[0].names[0].asname, None)
@@ -26,7 +26,7 @@ from pasta.base import ast_utils
 from pasta.base import scope
 
 
-def rename_external(t, old_name, new_name):
+def rename_external(t, old_name, new_name, sc=None):
   """Rename an imported name in a module.
 
   This will rewrite all import statements in `tree` that reference the old
@@ -52,18 +52,22 @@ def rename_external(t, old_name, new_name):
       and potentially new Import/ImportFrom nodes added.
     old_name: (string) Fully-qualified path of the name to replace.
     new_name: (string) Fully-qualified path of the name to update to.
+    sc: A scope.Scope representing t (generated from scratch if not provided).
 
   Returns:
     True if any changes were made, False otherwise.
   """
-  sc = scope.analyze(t)
+  if sc is None:
+    sc = scope.analyze(t)
 
   if old_name not in sc.external_references:
     return False
 
   has_changed = False
   renames = {}
-  already_changed = []
+  already_changed = set()
+  old_parts = old_name.split('.')
+  new_parts = new_name.split('.')
   for ref in sc.external_references[old_name]:
     if isinstance(ref.node, ast.alias):
       parent = sc.parent(ref.node)
@@ -71,9 +75,9 @@ def rename_external(t, old_name, new_name):
       # could if it is a child of an ImportFrom, the ImportFrom node's module
       # may also need to be updated.
       if isinstance(parent, ast.ImportFrom) and parent not in already_changed:
-        assert _rename_name_in_importfrom(sc, parent, old_name, new_name)
-        renames[old_name.rsplit('.', 1)[-1]] = new_name.rsplit('.', 1)[-1]
-        already_changed.append(parent)
+        assert _rename_name_in_importfrom(sc, parent, old_parts, new_parts)
+        renames[old_parts[-1]] = new_parts[-1]
+        already_changed.add(parent)
       else:
         ref.node.name = new_name + ref.node.name[len(old_name):]
         if not ref.node.asname:
@@ -81,9 +85,9 @@ def rename_external(t, old_name, new_name):
       has_changed = True
     elif isinstance(ref.node, ast.ImportFrom):
       if ref.node not in already_changed:
-        assert _rename_name_in_importfrom(sc, ref.node, old_name, new_name)
-        renames[old_name.rsplit('.', 1)[-1]] = new_name.rsplit('.', 1)[-1]
-        already_changed.append(ref.node)
+        assert _rename_name_in_importfrom(sc, ref.node, old_parts, new_parts)
+        renames[old_parts[-1]] = new_parts[-1]
+        already_changed.add(ref.node)
         has_changed = True
 
   for rename_old, rename_new in six.iteritems(renames):
@@ -91,13 +95,16 @@ def rename_external(t, old_name, new_name):
   return has_changed
 
 
-def _rename_name_in_importfrom(sc, node, old_name, new_name):
-  if old_name == new_name:
+def _rename_name_in_importfrom(sc, node, old_parts, new_parts):
+  """Rename an import in an ImportFrom node.
+
+  Takes the old and new names pre-split on dots so callers renaming many
+  imports only split them once.
+  """
+  if old_parts == new_parts:
     return False
 
   module_parts = node.module.split('.')
-  old_parts = old_name.split('.')
-  new_parts = new_name.split('.')
 
   # If just the module is changing, rename it
   if module_parts[:len(old_parts)] == old_parts:
@@ -19,6 +19,8 @@ from __future__ import division
 from __future__ import print_function
 
 import ast
+import copy
+import functools
 import textwrap
 import unittest
 
@@ -27,107 +29,142 @@ from pasta.base import scope
 from pasta.base import test_utils
 
 
+@functools.lru_cache(maxsize=None)
+def _parse_cached(src):
+  """Parse source once per distinct string.
+
+  The result is shared; use it directly only for expected trees that are
+  never mutated, and _parse for trees under test.
+  """
+  return ast.parse(src)
+
+
+def _parse(src):
+  """Parse source once per distinct string, deep-copying for isolation.
+
+  Several tests re-parse the same source to reset the tree between rename
+  attempts; the copy is much cheaper than a fresh parse.
+  """
+  return copy.deepcopy(_parse_cached(src))
+
+
+@functools.lru_cache(maxsize=None)
+def _analyze_cached(src):
+  t = ast.parse(src)
+  return t, scope.analyze(t)
+
+
+def _fixture(src):
+  """Return a (tree, scope) pair for src, analyzed at most once per source.
+
+  Both are deep-copied together so the scope's references point into the
+  returned tree.
+  """
+  return copy.deepcopy(_analyze_cached(src))
+
+
+# Dedented once here rather than on each test run.
+_TYPE_ANNOTATION_SRC = textwrap.dedent("""\
+    def foo(bar: 'aaa.bbb.ccc.Bar'):
+      pass
+    """)
+_TYPE_ANNOTATION_EXPECTED = textwrap.dedent("""\
+    def foo(bar: 'xxx.yyy.ccc.Bar'):
+      pass
+    """)
+
+
 class RenameTest(test_utils.TestCase):
 
   def test_rename_external_in_import(self):
     src = 'import aaa.bbb.ccc\naaa.bbb.ccc.foo()'
-    t = ast.parse(src)
+    t = _parse(src)
     self.assertTrue(rename.rename_external(t, 'aaa.bbb', 'xxx.yyy'))
-    self.checkAstsEqual(t, ast.parse('import xxx.yyy.ccc\nxxx.yyy.ccc.foo()'))
+    self.checkAstsEqual(t, _parse_cached('import xxx.yyy.ccc\nxxx.yyy.ccc.foo()'))
 
-    t = ast.parse(src)
+    t = _parse(src)
     self.assertTrue(rename.rename_external(t, 'aaa.bbb.ccc', 'xxx.yyy'))
-    self.checkAstsEqual(t, ast.parse('import xxx.yyy\nxxx.yyy.foo()'))
+    self.checkAstsEqual(t, _parse_cached('import xxx.yyy\nxxx.yyy.foo()'))
 
-    t = ast.parse(src)
+    t = _parse(src)
+    before = ast.dump(t)
     self.assertFalse(rename.rename_external(t, 'bbb', 'xxx.yyy'))
-    self.checkAstsEqual(t, ast.parse(src))
+    self.assertEqual(before, ast.dump(t))
 
   def test_rename_external_in_import_with_asname(self):
     src = 'import aaa.bbb.ccc as ddd\nddd.foo()'
-    t = ast.parse(src)
+    t = _parse(src)
     self.assertTrue(rename.rename_external(t, 'aaa.bbb', 'xxx.yyy'))
-    self.checkAstsEqual(t, ast.parse('import xxx.yyy.ccc as ddd\nddd.foo()'))
+    self.checkAstsEqual(t, _parse_cached('import xxx.yyy.ccc as ddd\nddd.foo()'))
 
   def test_rename_external_in_import_multiple_aliases(self):
     src = 'import aaa, aaa.bbb, aaa.bbb.ccc'
-    t = ast.parse(src)
+    t = _parse(src)
     self.assertTrue(rename.rename_external(t, 'aaa.bbb', 'xxx.yyy'))
-    self.checkAstsEqual(t, ast.parse('import aaa, xxx.yyy, xxx.yyy.ccc'))
+    self.checkAstsEqual(t, _parse_cached('import aaa, xxx.yyy, xxx.yyy.ccc'))
 
   def test_rename_external_in_importfrom(self):
     src = 'from aaa.bbb.ccc import ddd\nddd.foo()'
-    t = ast.parse(src)
+    t = _parse(src)
     self.assertTrue(rename.rename_external(t, 'aaa.bbb', 'xxx.yyy'))
-    self.checkAstsEqual(t, ast.parse('from xxx.yyy.ccc import ddd\nddd.foo()'))
+    self.checkAstsEqual(t, _parse_cached('from xxx.yyy.ccc import ddd\nddd.foo()'))
 
-    t = ast.parse(src)
+    t = _parse(src)
     self.assertTrue(rename.rename_external(t, 'aaa.bbb.ccc', 'xxx.yyy'))
-    self.checkAstsEqual(t, ast.parse('from xxx.yyy import ddd\nddd.foo()'))
+    self.checkAstsEqual(t, _parse_cached('from xxx.yyy import ddd\nddd.foo()'))
 
-    t = ast.parse(src)
+    t = _parse(src)
+    before = ast.dump(t)
     self.assertFalse(rename.rename_external(t, 'bbb', 'xxx.yyy'))
-    self.checkAstsEqual(t, ast.parse(src))
+    self.assertEqual(before, ast.dump(t))
 
   def test_rename_external_in_importfrom_alias(self):
     src = 'from aaa.bbb import ccc\nccc.foo()'
-    t = ast.parse(src)
+    t = _parse(src)
     self.assertTrue(rename.rename_external(t, 'aaa.bbb.ccc', 'xxx.yyy'))
-    self.checkAstsEqual(t, ast.parse('from xxx import yyy\nyyy.foo()'))
+    self.checkAstsEqual(t, _parse_cached('from xxx import yyy\nyyy.foo()'))
 
   def test_rename_external_in_importfrom_alias_with_asname(self):
     src = 'from aaa.bbb import ccc as abc\nabc.foo()'
-    t = ast.parse(src)
+    t = _parse(src)
     self.assertTrue(rename.rename_external(t, 'aaa.bbb.ccc', 'xxx.yyy'))
-    self.checkAstsEqual(t, ast.parse('from xxx import yyy as abc\nabc.foo()'))
+    self.checkAstsEqual(t, _parse_cached('from xxx import yyy as abc\nabc.foo()'))
 
   def test_rename_reads_name(self):
     src = 'aaa.bbb()'
-    t = ast.parse(src)
-    sc = scope.analyze(t)
+    t, sc = _fixture(src)
     self.assertTrue(rename._rename_reads(sc, t, 'aaa', 'xxx'))
-    self.checkAstsEqual(t, ast.parse('xxx.bbb()'))
+    self.checkAstsEqual(t, _parse_cached('xxx.bbb()'))
 
   def test_rename_reads_name_as_attribute(self):
     src = 'aaa.bbb()'
-    t = ast.parse(src)
-    sc = scope.analyze(t)
+    t, sc = _fixture(src)
     rename._rename_reads(sc, t, 'aaa', 'xxx.yyy')
-    self.checkAstsEqual(t, ast.parse('xxx.yyy.bbb()'))
+    self.checkAstsEqual(t, _parse_cached('xxx.yyy.bbb()'))
 
   def test_rename_reads_attribute(self):
     src = 'aaa.bbb.ccc()'
-    t = ast.parse(src)
-    sc = scope.analyze(t)
+    t, sc = _fixture(src)
     rename._rename_reads(sc, t, 'aaa.bbb', 'xxx.yyy')
-    self.checkAstsEqual(t, ast.parse('xxx.yyy.ccc()'))
+    self.checkAstsEqual(t, _parse_cached('xxx.yyy.ccc()'))
 
   def test_rename_reads_noop(self):
     src = 'aaa.bbb.ccc()'
-    t = ast.parse(src)
-    sc = scope.analyze(t)
+    t, sc = _fixture(src)
     rename._rename_reads(sc, t, 'aaa.bbb.ccc.ddd', 'xxx.yyy')
     rename._rename_reads(sc, t, 'bbb.aaa', 'xxx.yyy')
-    self.checkAstsEqual(t, ast.parse(src))
+    self.checkAstsEqual(t, _parse_cached(src))
 
   @test_utils.requires_features('type_annotations')
   def test_rename_reads_type_annotation(self):
-    src = textwrap.dedent("""\
-        def foo(bar: 'aaa.bbb.ccc.Bar'):
-          pass
-        """)
-    t = ast.parse(src)
-    sc = scope.analyze(t)
+    t, sc = _fixture(_TYPE_ANNOTATION_SRC)
     rename._rename_reads(sc, t, 'aaa.bbb', 'xxx.yyy')
-    self.checkAstsEqual(t, ast.parse(textwrap.dedent("""\
-        def foo(bar: 'xxx.yyy.ccc.Bar'):
-          pass
-        """)))
+    self.checkAstsEqual(t, _parse_cached(_TYPE_ANNOTATION_EXPECTED))
 
 
 def suite():
   result = unittest.TestSuite()
-  result.addTests(unittest.makeSuite(RenameTest))
+  result.addTests(unittest.defaultTestLoader.loadTestsFromTestCase(RenameTest))
   return result
 
 if __name__ == '__main__':
@@ -34,6 +34,14 @@ from pasta.base import ast_utils
 from pasta.base import formatting as fmt
 from pasta.base import token_generator
 
+# Token constants bound once here; the hot parsing paths below reference
+# them on every token rather than chasing module attributes each time.
+_STRING_TYPES = six.string_types
+_NUMBER_TOKEN = token_generator.TOKENS.NUMBER
+_INDENT_TOKEN = token_generator.TOKENS.INDENT
+_NEWLINE_TOKENS = frozenset((token_generator.TOKENS.NL,
+                             token_generator.TOKENS.NEWLINE))
+
 
 # ==============================================================================
 # == Helper functions for decorating nodes with prefix + suffix               ==
@@ -43,7 +51,7 @@ def _gen_wrapper(f, scope=True, prefix=True, suffix=True, max_suffix_lines=None,
                  semicolon=False, comment=False, statement=False):
   @contextlib.wraps(f)
   def wrapped(self, node, *args, **kwargs):
-    with (self.scope(node, trailing_comma=False) if scope else _noop_context()):
+    with (self.scope(node, trailing_comma=False) if scope else _NOOP_CONTEXT):
       if prefix:
         self.prefix(node, default=self._indent if statement else '')
       f(self, node, *args, **kwargs)
@@ -53,9 +61,23 @@ def _gen_wrapper(f, scope=True, prefix=True, suffix=True, max_suffix_lines=None,
   return wrapped
 
 
-@contextlib.contextmanager
-def _noop_context():
-  yield
+class _NoopContext(object):
+  """A reusable no-op context manager.
+
+  Cheaper than a fresh @contextmanager generator for the many decorated
+  visitors that don't open a scope.
+  """
+
+  __slots__ = ()
+
+  def __enter__(self):
+    return None
+
+  def __exit__(self, *unused_exc_info):
+    return False
+
+
+_NOOP_CONTEXT = _NoopContext()
 
 
 def expression(f):
@@ -129,6 +151,9 @@ class BaseVisitor(ast.NodeVisitor):
     self._indent = ''
     self._indent_diff = ''
     self._default_indent_diff = '  '
+    # Shared pattern for prefix(); built once instead of allocating a new
+    # closure and list on every visited node.
+    self._prefix_pattern = (functools.partial(self.ws, comment=True),)
 
   def visit(self, node):
     self._stack.append(node)
@@ -137,7 +162,7 @@ class BaseVisitor(ast.NodeVisitor):
 
   def prefix(self, node, default=''):
     """Account for some amount of whitespace as the prefix to a node."""
-    self.attr(node, 'prefix', [lambda: self.ws(comment=True)], default=default)
+    self.attr(node, 'prefix', self._prefix_pattern, default=default)
 
   def suffix(self, node, max_lines=None, semicolon=False, comment=False,
              default=''):
@@ -164,9 +189,8 @@ class BaseVisitor(ast.NodeVisitor):
   def set_default_indent_diff(self, indent):
     self._default_indent_diff = indent
 
-  @contextlib.contextmanager
   def scope(self, node, attr=None, trailing_comma=False, default_parens=False):
-    """Context manager to handle a parenthesized scope.
+    """Return a context manager to handle a parenthesized scope.
 
     Arguments:
       node: (ast.AST) Node to store the scope prefix and suffix on.
@@ -177,13 +201,18 @@ class BaseVisitor(ast.NodeVisitor):
       default_parens: (boolean) If True and no formatting information is
         present, the scope would be assumed to be parenthesized.
     """
-    if attr:
-      self.attr(node, attr + '_prefix', [],
-                default='(' if default_parens else '')
+    if not attr:
+      # Without an attr there is nothing to record; skip the generator.
+      return _NOOP_CONTEXT
+    return self._attr_scope(node, attr, default_parens)
+
+  @contextlib.contextmanager
+  def _attr_scope(self, node, attr, default_parens):
+    self.attr(node, attr + '_prefix', [],
+              default='(' if default_parens else '')
     yield
-    if attr:
-      self.attr(node, attr + '_suffix', [],
-                default=')' if default_parens else '')
+    self.attr(node, attr + '_suffix', [],
+              default=')' if default_parens else '')
 
   def token(self, token_val):
     """Account for a specific token."""
@@ -245,10 +274,11 @@ class BaseVisitor(ast.NodeVisitor):
       self.visit(stmt)
 
     if node.orelse:
-      if (len(node.orelse) == 1 and isinstance(node.orelse[0], ast.If) and
-          self.check_is_elif(node.orelse[0])):
-        fmt.set(node.orelse[0], 'is_elif', True)
-        self.visit(node.orelse[0])
+      orelse0 = node.orelse[0]
+      if (len(node.orelse) == 1 and isinstance(orelse0, ast.If) and
+          self.check_is_elif(orelse0)):
+        fmt.set(orelse0, 'is_elif', True)
+        self.visit(orelse0)
       else:
         self.attr(node, 'elseprefix', [self.ws])
         self.token('else')
@@ -397,18 +427,20 @@ class BaseVisitor(ast.NodeVisitor):
     self.attr(node, 'class_def', ['class', self.ws, node.name, self.ws],
               default='class %s' % node.name, deps=('name',))
     class_args = getattr(node, 'bases', []) + getattr(node, 'keywords', [])
+    last_arg = len(class_args) - 1
     with self.scope(node, 'bases', trailing_comma=bool(class_args),
                     default_parens=True):
       for i, base in enumerate(node.bases):
         self.visit(base)
         self.attr(node, 'base_suffix_%d' % i, [self.ws])
-        if base != class_args[-1]:
+        if i != last_arg:
           self.attr(node, 'base_sep_%d' % i, [',', self.ws], default=', ')
       if hasattr(node, 'keywords'):
+        last_keyword = len(node.keywords) - 1
         for i, keyword in enumerate(node.keywords):
           self.visit(keyword)
           self.attr(node, 'keyword_suffix_%d' % i, [self.ws])
-          if keyword != node.keywords[-1]:
+          if i != last_keyword:
             self.attr(node, 'keyword_sep_%d' % i, [',', self.ws], default=', ')
     self.attr(node, 'open_block', [self.ws, ':', self.ws_oneline],
               default=':\n')
@@ -433,9 +465,9 @@ class BaseVisitor(ast.NodeVisitor):
                 deps=('name',), default='def %s' % node.name)
     # In Python 3, there can be extra args in kwonlyargs
     kwonlyargs = getattr(node.args, 'kwonlyargs', [])
-    args_count = sum((len(node.args.args + kwonlyargs),
-                      1 if node.args.vararg else 0,
-                      1 if node.args.kwarg else 0))
+    args_count = (len(node.args.args) + len(kwonlyargs) +
+                  (1 if node.args.vararg else 0) +
+                  (1 if node.args.kwarg else 0))
     with self.scope(node, 'args', trailing_comma=args_count > 0,
                     default_parens=True):
       self.visit(node.args)
@@ -608,9 +640,10 @@ class BaseVisitor(ast.NodeVisitor):
   @statement
   def visit_Delete(self, node):
     self.attr(node, 'del', ['del', self.ws], default='del ')
+    last_target = len(node.targets) - 1
     for i, target in enumerate(node.targets):
       self.visit(target)
-      if target is not node.targets[-1]:
+      if i != last_target:
         self.attr(node, 'comma_%d' % i, [self.ws, ',', self.ws], default=', ')
 
   @statement
@@ -645,10 +678,11 @@ class BaseVisitor(ast.NodeVisitor):
   @statement
   def visit_Import(self, node):
     self.token('import')
+    last_alias = len(node.names) - 1
     for i, alias in enumerate(node.names):
       self.attr(node, 'alias_prefix_%d' % i, [self.ws], default=' ')
       self.visit(alias)
-      if alias != node.names[-1]:
+      if i != last_alias:
         self.attr(node, 'alias_sep_%d' % i, [self.ws, ','], default=',')
 
   @statement
@@ -657,13 +691,14 @@ class BaseVisitor(ast.NodeVisitor):
     self.attr(node, 'module_prefix', [self.ws], default=' ')
 
     module_pattern = []
+    ws = self.ws
     if node.level > 0:
-      module_pattern.extend([self.dots(node.level), self.ws])
+      module_pattern.extend((self.dots(node.level), ws))
     if node.module:
       parts = node.module.split('.')
       for part in parts[:-1]:
-        module_pattern += [self.ws, part, self.ws, '.']
-      module_pattern += [self.ws, parts[-1]]
+        module_pattern.extend((ws, part, ws, '.'))
+      module_pattern.extend((ws, parts[-1]))
 
     self.attr(node, 'module', module_pattern,
               deps=('level', 'module'),
@@ -672,10 +707,11 @@ class BaseVisitor(ast.NodeVisitor):
 
     self.token('import')
     with self.scope(node, 'names', trailing_comma=True):
+      last_alias = len(node.names) - 1
       for i, alias in enumerate(node.names):
         self.attr(node, 'alias_prefix_%d' % i, [self.ws], default=' ')
         self.visit(alias)
-        if alias is not node.names[-1]:
+        if i != last_alias:
           self.attr(node, 'alias_sep_%d' % i, [self.ws, ','], default=',')
 
   @expression
@@ -709,9 +745,10 @@ class BaseVisitor(ast.NodeVisitor):
       elif not node.nl:
         self.attr(node, 'trailing_comma', [self.ws, ','], default=',')
 
+    last_value = len(node.values) - 1
     for i, value in enumerate(node.values):
       self.visit(value)
-      if value is not node.values[-1]:
+      if i != last_value:
         self.attr(node, 'comma_%d' % i, [self.ws, ',', self.ws], default=', ')
       elif not node.nl:
         self.attr(node, 'trailing_comma', [self.ws, ','], default=',')
@@ -757,9 +794,10 @@ class BaseVisitor(ast.NodeVisitor):
   @expression
   def visit_BoolOp(self, node):
     op_symbol = ast_constants.NODE_TYPE_TO_TOKENS[type(node.op)][0]
+    last_value = len(node.values) - 1
     for i, value in enumerate(node.values):
       self.visit(value)
-      if value is not node.values[-1]:
+      if i != last_value:
         self.attr(node, 'op_%d' % i, [self.ws, op_symbol, self.ws],
                   default=' %s ' % op_symbol, deps=('op',))
 
@@ -838,9 +876,10 @@ class BaseVisitor(ast.NodeVisitor):
     all_args = sorted(node.args + node.keywords,
                       key=functools.cmp_to_key(arg_compare))
 
+    last_arg = len(all_args) - 1
     for i, arg in enumerate(all_args):
       self.visit(arg)
-      if arg is not all_args[-1]:
+      if i != last_arg:
         self.attr(node, 'comma_%d' % i, [self.ws, ',', self.ws], default=', ')
     return bool(all_args)
 
@@ -851,11 +890,13 @@ class BaseVisitor(ast.NodeVisitor):
   @expression
   def visit_Compare(self, node):
     self.visit(node.left)
-    for i, (op, comparator) in enumerate(zip(node.ops, node.comparators)):
+    ops = node.ops
+    comparators = node.comparators
+    for i in range(len(ops)):
       self.attr(node, 'op_prefix_%d' % i, [self.ws], default=' ')
-      self.visit(op)
+      self.visit(ops[i])
       self.attr(node, 'op_suffix_%d' % i, [self.ws], default=' ')
-      self.visit(comparator)
+      self.visit(comparators[i])
 
   @expression
   def visit_Constant(self, node):
@@ -868,9 +909,7 @@ class BaseVisitor(ast.NodeVisitor):
     elif node.value is Ellipsis:
       self.token('...')
     elif isinstance(node.value, numbers.Number):
-      token_number_type = token_generator.TOKENS.NUMBER
-      self.attr(node, 'content',
-                [lambda: self.tokens.next_of_type(token_number_type).src],
+      self.attr(node, 'content', self._number_pattern,
                 deps=('value',), default=str(node.value))
     elif isinstance(node.value, six.text_type) or isinstance(node.value, bytes):
       self.attr(node, 'content', [self.tokens.str], deps=('value',),
@@ -881,7 +920,12 @@ class BaseVisitor(ast.NodeVisitor):
   @expression
   def visit_Dict(self, node):
     self.token('{')
-    for i, key, value in zip(range(len(node.keys)), node.keys, node.values):
+    keys = node.keys
+    values = node.values
+    last_value = len(values) - 1
+    for i in range(len(keys)):
+      key = keys[i]
+      value = values[i]
       if key is None:
         # Handle Python 3.5+ dict unpacking syntax (PEP-448)
         self.attr(node, 'starstar_%d' % i, [self.ws, '**'], default='**')
@@ -890,7 +934,7 @@ class BaseVisitor(ast.NodeVisitor):
         self.attr(node, 'key_val_sep_%d' % i, [self.ws, ':', self.ws],
                   default=': ')
       self.visit(value)
-      if value is not node.values[-1]:
+      if i != last_value:
         self.attr(node, 'comma_%d' % i, [self.ws, ',', self.ws], default=', ')
     self.optional_token(node, 'extracomma', ',', allow_whitespace_prefix=True)
     self.attr(node, 'close_prefix', [self.ws, '}'], default='}')
@@ -928,9 +972,10 @@ class BaseVisitor(ast.NodeVisitor):
   def visit_List(self, node):
     self.attr(node, 'list_open', ['[', self.ws], default='[')
 
+    last_elt = len(node.elts) - 1
     for i, elt in enumerate(node.elts):
       self.visit(elt)
-      if elt is not node.elts[-1]:
+      if i != last_elt:
         self.attr(node, 'comma_%d' % i, [self.ws, ',', self.ws], default=', ')
     if node.elts:
       self.optional_token(node, 'extracomma', ',', allow_whitespace_prefix=True)
@@ -969,9 +1014,10 @@ class BaseVisitor(ast.NodeVisitor):
   def visit_Set(self, node):
     self.attr(node, 'set_open', ['{', self.ws], default='{')
 
+    last_elt = len(node.elts) - 1
     for i, elt in enumerate(node.elts):
       self.visit(elt)
-      if elt is not node.elts[-1]:
+      if i != last_elt:
         self.attr(node, 'comma_%d' % i, [self.ws, ',', self.ws], default=', ')
       else:
         self.optional_token(node, 'extracomma', ',',
@@ -993,9 +1039,10 @@ class BaseVisitor(ast.NodeVisitor):
   @expression
   def visit_Tuple(self, node):
     with self.scope(node, 'elts', default_parens=True):
+      last_elt = len(node.elts) - 1
       for i, elt in enumerate(node.elts):
         self.visit(elt)
-        if elt is not node.elts[-1]:
+        if i != last_elt:
           self.attr(node, 'comma_%d' % i, [self.ws, ',', self.ws],
                     default=', ')
         else:
@@ -1136,15 +1183,16 @@ class BaseVisitor(ast.NodeVisitor):
     kw_defaults = getattr(node, 'kw_defaults', [])
     assert len(kwonlyargs) == len(kw_defaults)
 
-    total_args = sum((len(node.args + kwonlyargs),
-                      len(getattr(node, 'posonlyargs', [])),
-                      1 if node.vararg else 0,
-                      1 if node.kwarg else 0))
+    posonlyargs = getattr(node, 'posonlyargs', [])
+    num_posonly = len(posonlyargs)
+    total_args = (len(node.args) + len(kwonlyargs) + num_posonly +
+                  (1 if node.vararg else 0) + (1 if node.kwarg else 0))
     arg_i = 0
 
-    pos_args = getattr(node, 'posonlyargs', []) + node.args
-    positional = pos_args[:-len(node.defaults)] if node.defaults else pos_args
-    keyword = node.args[-len(node.defaults):] if node.defaults else node.args
+    num_defaults = len(node.defaults)
+    pos_args = posonlyargs + node.args
+    positional = pos_args[:-num_defaults] if num_defaults else pos_args
+    keyword = node.args[-num_defaults:] if num_defaults else node.args
 
     for arg in positional:
       self.visit(arg)
@@ -1152,7 +1200,7 @@ class BaseVisitor(ast.NodeVisitor):
       if arg_i < total_args:
         self.attr(node, 'comma_%d' % arg_i, [self.ws, ',', self.ws],
                   default=', ')
-      if arg_i == len(getattr(node, 'posonlyargs', [])):
+      if arg_i == num_posonly:
         self.attr(node, 'posonly_sep', [self.ws, '/', self.ws, ',', self.ws],
                   default='/, ')
 
@@ -1229,9 +1277,10 @@ class BaseVisitor(ast.NodeVisitor):
 
   @space_left
   def visit_ExtSlice(self, node):
+    last_dim = len(node.dims) - 1
     for i, dim in enumerate(node.dims):
       self.visit(dim)
-      if dim is not node.dims[-1]:
+      if i != last_dim:
         self.attr(node, 'dim_sep_%d' % i, [self.ws, ',', self.ws], default=', ')
     self.optional_token(node, 'trailing_comma', ',', default=False)
 
@@ -1284,6 +1333,13 @@ class AstAnnotator(BaseVisitor):
   def __init__(self, source):
     super(AstAnnotator, self).__init__()
     self.tokens = token_generator.TokenGenerator(source)
+    # Shared patterns for visit_Num; numeric literals are common enough to
+    # warrant not allocating a closure and list per node.
+    self._number_pattern = (self._read_number,)
+    self._negative_number_pattern = ('-', self._read_number)
+
+  def _read_number(self):
+    return self.tokens.next_of_type(_NUMBER_TOKEN).src
 
   def visit(self, node):
     try:
@@ -1317,7 +1373,7 @@ class AstAnnotator(BaseVisitor):
 
     # Find the indent level of the first child
     indent_token = self.tokens.peek_conditional(
-        lambda t: t.type == token_generator.TOKENS.INDENT)
+        lambda t: t.type == _INDENT_TOKEN)
     new_indent = indent_token.src
     new_diff = _get_indent_diff(prev_indent, new_indent)
     if not new_diff:
@@ -1341,10 +1397,8 @@ class AstAnnotator(BaseVisitor):
   @expression
   def visit_Num(self, node):
     """Annotate a Num node with the exact number format."""
-    token_number_type = token_generator.TOKENS.NUMBER
-    contentargs = [lambda: self.tokens.next_of_type(token_number_type).src]
-    if self.tokens.peek().src == '-':
-      contentargs.insert(0, '-')
+    contentargs = (self._negative_number_pattern
+                   if self.tokens.peek().src == '-' else self._number_pattern)
     self.attr(node, 'content', contentargs, deps=('n',), default=str(node.n))
 
   @expression
@@ -1412,8 +1466,7 @@ class AstAnnotator(BaseVisitor):
     if semicolon and next_token and next_token.src == ';':
       result = self.tokens.whitespace() + self.token(';')
       next_token = self.tokens.peek()
-      if next_token.type in (token_generator.TOKENS.NL,
-                             token_generator.TOKENS.NEWLINE):
+      if next_token.type in _NEWLINE_TOKENS:
         result += self.tokens.whitespace(max_lines=1)
       return result
     return self.tokens.whitespace(max_lines=max_lines, comment=comment)
@@ -1502,11 +1555,11 @@ class AstAnnotator(BaseVisitor):
     """
     del default  # unused
     if deps:
-      for dep in deps:
-        fmt.set(node, dep + '__src', getattr(node, dep, None))
+      for dep, src_key in _deps_src_keys(tuple(deps)):
+        fmt.set(node, src_key, getattr(node, dep, None))
     attr_parts = []
     for attr_val in attr_vals:
-      if isinstance(attr_val, six.string_types):
+      if isinstance(attr_val, _STRING_TYPES):
         attr_parts.append(self.token(attr_val))
       else:
         attr_parts.append(attr_val())
@@ -1536,6 +1589,16 @@ class AstAnnotator(BaseVisitor):
       return token.src + self.ws()
 
 
+@functools.lru_cache(maxsize=None)
+def _deps_src_keys(deps):
+  """Map a deps tuple to (dep, dep + '__src') formatting-key pairs.
+
+  The same few deps tuples are passed for every node of a given type, so
+  caching avoids rebuilding the key strings on each attr() call.
+  """
+  return tuple((dep, dep + '__src') for dep in deps)
+
+
 def _get_indent_width(indent):
   width = 0
   for c in indent:
@@ -33,15 +33,21 @@ _AST_OP_NODES = (
     ast.Lt, ast.LtE, ast.Gt, ast.GtE, ast.Add, ast.Sub, ast.Mult, ast.Div,
     ast.Mod, ast.Pow, ast.LShift, ast.RShift, ast.BitAnd, ast.BitOr, ast.BitXor,
     ast.FloorDiv, ast.Invert, ast.Not, ast.UAdd, ast.USub
-) 
+)
+
+# Frozenset of the op node types for fast membership tests. Op nodes are leaf
+# classes in the ast module, so a type-identity check is equivalent to
+# isinstance but skips the MRO walk for every node visited.
+_AST_OP_TYPESET = frozenset(_AST_OP_NODES)
 
 
 class _TreeNormalizer(ast.NodeTransformer):
   """Replaces all op nodes with unique instances."""
 
   def visit(self, node):
-    if isinstance(node, _AST_OP_NODES):
-      return node.__class__()
+    node_type = type(node)
+    if node_type in _AST_OP_TYPESET:
+      return node_type()
     return super(_TreeNormalizer, self).visit(node)
 
 
@@ -71,12 +77,22 @@ def sanitize_source(src):
 
 
 def find_nodes_by_type(node, accept_types):
-  visitor = FindNodeVisitor(lambda n: isinstance(n, accept_types))
+  if not isinstance(accept_types, tuple):
+    accept_types = (accept_types,)
+  accept_typeset = frozenset(accept_types)
+  visitor = FindNodeVisitor(lambda n: type(n) in accept_typeset)
   visitor.visit(node)
   return visitor.results
 
 
-class FindNodeVisitor(ast.NodeVisitor):
+class FindNodeVisitor(object):
+  """Collects nodes matching a condition, in the order they are visited.
+
+  This only ever performs a full generic walk, so it recurses directly
+  instead of going through ast.NodeVisitor's per-node method dispatch.
+  """
+
+  __slots__ = ('_condition', 'results')
 
   def __init__(self, condition):
     self._condition = condition
@@ -85,7 +101,8 @@ class FindNodeVisitor(ast.NodeVisitor):
   def visit(self, node):
     if self._condition(node):
       self.results.append(node)
-    super(FindNodeVisitor, self).visit(node)
+    for child in ast.iter_child_nodes(node):
+      self.visit(child)
 
 
 def get_last_child(node):
@@ -22,27 +22,37 @@ PASTA_DICT = '__pasta__'
 
 
 def get(node, name, default=None):
-  try:
-    return _formatting_dict(node).get(name, default)
-  except AttributeError:
+  formatting = getattr(node, PASTA_DICT, None)
+  if formatting is None:
     return default
+  return formatting.get(name, default)
 
 
 def set(node, name, value):
-  if not hasattr(node, PASTA_DICT):
+  formatting = getattr(node, PASTA_DICT, None)
+  if formatting is None:
     try:
       setattr(node, PASTA_DICT, {})
     except AttributeError:
       pass
-  _formatting_dict(node)[name] = value
+    formatting = _formatting_dict(node)
+  formatting[name] = value
 
 
 def append(node, name, value):
-  set(node, name, get(node, name, '') + value)
+  formatting = getattr(node, PASTA_DICT, None)
+  if formatting is None:
+    set(node, name, value)
+  else:
+    formatting[name] = formatting.get(name, '') + value
 
 
 def prepend(node, name, value):
-  set(node, name, value + get(node, name, ''))
+  formatting = getattr(node, PASTA_DICT, None)
+  if formatting is None:
+    set(node, name, value)
+  else:
+    formatting[name] = value + formatting.get(name, '')
 
 
 def _formatting_dict(node):
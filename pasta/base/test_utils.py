@@ -32,7 +32,14 @@ class TestCase(unittest.TestCase):
 
     Ignores `ctx` fields and formatting info.
     """
-    if a is None and b is None:
+    # Identity also covers the a is None is b case.
+    if a is b:
+      return
+    # Identical dumps mean identical trees, so succeed without the slower
+    # field-by-field walk below. Differing dumps can still be equal (ctx
+    # fields are ignored), so fall through rather than failing here.
+    if (isinstance(a, ast.AST) and isinstance(b, ast.AST) and
+        ast.dump(a) == ast.dump(b)):
       return
     try:
       self.assertIsNotNone(a)
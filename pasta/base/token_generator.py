@@ -49,8 +49,14 @@ from pasta.base import fstring_utils
 # Alias for extracting token names
 TOKENS = tokenize
 Token = collections.namedtuple('Token', ('type', 'src', 'start', 'end', 'line'))
-FORMATTING_TOKENS = (TOKENS.INDENT, TOKENS.DEDENT, TOKENS.NL, TOKENS.NEWLINE,
-                     TOKENS.COMMENT)
+FORMATTING_TOKENS = frozenset((TOKENS.INDENT, TOKENS.DEDENT, TOKENS.NL,
+                               TOKENS.NEWLINE, TOKENS.COMMENT))
+
+# Precomputed token-type sets for the hot predicates below; frozenset
+# membership is a single hash probe and avoids rebuilding a tuple per call.
+_INDENT_DEDENT_TOKENS = frozenset((TOKENS.INDENT, TOKENS.DEDENT))
+_NEWLINE_TOKENS = frozenset((TOKENS.NL, TOKENS.NEWLINE))
+_STRING_COMMENT_TOKENS = frozenset((TOKENS.STRING, TOKENS.COMMENT))
 
 
 class TokenGenerator(object):
@@ -144,29 +150,29 @@ class TokenGenerator(object):
     if not comment and next_token and next_token.type == TOKENS.COMMENT:
       return ''
     def predicate(token):
-      return (token.type in (TOKENS.INDENT, TOKENS.DEDENT) or
+      return (token.type in _INDENT_DEDENT_TOKENS or
               token.type == TOKENS.COMMENT and (comment or self._hints) or
               token.type == TOKENS.ERRORTOKEN and token.src == ' ' or
-              max_lines is None and token.type in (TOKENS.NL, TOKENS.NEWLINE))
+              max_lines is None and token.type in _NEWLINE_TOKENS)
     whitespace = list(self.takewhile(predicate, advance=False))
     next_token = self.peek()
 
-    result = ''
+    parts = []
     for tok in itertools.chain(whitespace,
                                ((next_token,) if next_token else ())):
-      result += self._space_between(self._loc, tok.start)
+      parts.append(self._space_between(self._loc, tok.start))
       if tok != next_token:
-        result += tok.src
+        parts.append(tok.src)
         self._loc = tok.end
       else:
         self._loc = tok.start
 
     # Eat a single newline character
     if ((max_lines is None or max_lines > 0) and
-        next_token and next_token.type in (TOKENS.NL, TOKENS.NEWLINE)):
-      result += self.next().src
+        next_token and next_token.type in _NEWLINE_TOKENS):
+      parts.append(self.next().src)
 
-    return result
+    return ''.join(parts)
 
   def block_whitespace(self, indent_level):
     """Parses whitespace from the current _loc to the end of the block."""
@@ -202,20 +208,21 @@ class TokenGenerator(object):
     `.` tokens next to each other in a FromImport's level as an ellipsis. This
     parses until the expected number of dots have been seen.
     """
-    result = ''
+    parts = []
     dots_seen = 0
     prev_loc = self._loc
     while dots_seen < num_dots:
       tok = self.next()
       assert tok.src in ('.', '...')
-      result += self._space_between(prev_loc, tok.start) + tok.src
+      parts.append(self._space_between(prev_loc, tok.start))
+      parts.append(tok.src)
       dots_seen += tok.src.count('.')
       prev_loc = self._loc
-    return result
+    return ''.join(parts)
 
   def open_scope(self, node, single_paren=False):
     """Open a parenthesized scope on the given node."""
-    result = ''
+    parts = []
     parens = []
     start_i = self._i
     start_loc = prev_loc = self._loc
@@ -223,19 +230,20 @@ class TokenGenerator(object):
     # Eat whitespace or '(' tokens one at a time
     for tok in self.takewhile(
         lambda t: t.type in FORMATTING_TOKENS or t.src == '('):
+      src = tok.src
       # Stores all the code up to and including this token
-      result += self._space_between(prev_loc, tok.start)
+      parts.append(self._space_between(prev_loc, tok.start))
 
-      if tok.src == '(' and single_paren and parens:
+      if src == '(' and single_paren and parens:
         self.rewind()
         self._loc = tok.start
         break
 
-      result += tok.src
-      if tok.src == '(':
+      parts.append(src)
+      if src == '(':
         # Start a new scope
-        parens.append(result)
-        result = ''
+        parens.append(''.join(parts))
+        del parts[:]
         start_i = self._i
         start_loc = self._loc
       prev_loc = self._loc
@@ -243,7 +251,8 @@ class TokenGenerator(object):
     if parens:
       # Add any additional whitespace on to the last open-paren
       next_tok = self.peek()
-      parens[-1] += result + self._space_between(self._loc, next_tok.start)
+      parts.append(self._space_between(self._loc, next_tok.start))
+      parens[-1] += ''.join(parts)
       self._loc = next_tok.start
       # Add each paren onto the stack
       for paren in parens:
@@ -271,29 +280,30 @@ class TokenGenerator(object):
     parsed_to_i = self._i
     parsed_to_loc = prev_loc = self._loc
     encountered_paren = False
-    result = ''
+    parts = []
 
     for tok in self.takewhile(
         lambda t: t.type in FORMATTING_TOKENS or t.src in symbols):
+      src = tok.src
       # Consume all space up to this token
-      result += self._space_between(prev_loc, tok.start)
-      if tok.src == ')' and single_paren and encountered_paren:
+      parts.append(self._space_between(prev_loc, tok.start))
+      if src == ')' and single_paren and encountered_paren:
         self.rewind()
         parsed_to_i = self._i
         parsed_to_loc = tok.start
-        fmt.append(node, suffix_attr, result)
+        fmt.append(node, suffix_attr, ''.join(parts))
         break
 
       # Consume the token itself
-      result += tok.src
+      parts.append(src)
 
-      if tok.src == ')':
+      if src == ')':
         # Close out the open scope
         encountered_paren = True
         self._scope_stack.pop()
         fmt.prepend(node, prefix_attr, self._parens.pop())
-        fmt.append(node, suffix_attr, result)
-        result = ''
+        fmt.append(node, suffix_attr, ''.join(parts))
+        del parts[:]
         parsed_to_i = self._i
         parsed_to_loc = tok.end
         if not self._parens or node not in self._scope_stack[-1]:
@@ -334,24 +344,24 @@ class TokenGenerator(object):
   def str(self):
     """Parse a full string literal from the input."""
     def predicate(token):
-      return (token.type in (TOKENS.STRING, TOKENS.COMMENT) or
-              self.is_in_scope() and token.type in (TOKENS.NL, TOKENS.NEWLINE))
+      return (token.type in _STRING_COMMENT_TOKENS or
+              self.is_in_scope() and token.type in _NEWLINE_TOKENS)
 
     return self.eat_tokens(predicate)
 
   def eat_tokens(self, predicate):
     """Parse input from tokens while a given condition is met."""
-    content = ''
+    parts = []
     prev_loc = self._loc
     tok = None
     for tok in self.takewhile(predicate, advance=False):
-      content += self._space_between(prev_loc, tok.start)
-      content += tok.src
+      parts.append(self._space_between(prev_loc, tok.start))
+      parts.append(tok.src)
       prev_loc = tok.end
 
     if tok:
       self._loc = tok.end
-    return content
+    return ''.join(parts)
 
   def fstr(self):
     """Parses an fstring, including subexpressions.
@@ -481,11 +491,11 @@ class TokenGenerator(object):
     if prev_row == end_row:
       return self.lines[prev_row - 1][prev_col:end_col]
 
-    return ''.join(itertools.chain(
-        (self.lines[prev_row - 1][prev_col:],),
-        self.lines[prev_row:end_row - 1],
-        (self.lines[end_row - 1][:end_col],) if end_col > 0 else '',
-    ))
+    parts = [self.lines[prev_row - 1][prev_col:]]
+    parts.extend(self.lines[prev_row:end_row - 1])
+    if end_col > 0:
+      parts.append(self.lines[end_row - 1][:end_col])
+    return ''.join(parts)
 
   def next_name(self):
     """Parse the next name token."""